@@ -1,7 +1,10 @@
+from typing import Any
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.db.models import ExpressionWrapper
 from django.db.models import F
+from django.db.models import QuerySet
 from django.db.models import fields
 from django.db.models.functions import Coalesce
 from django.http import HttpRequest
@@ -10,20 +13,31 @@ from django.utils.translation import gettext_lazy as _
 
 from core.models import AbsenceBalance
 from core.models import Activity
+from core.models import ClearCacheMixin
 from core.models import Holiday
 from core.models import Project
 from core.models import Settings
 from core.models import TimeLog
 from core.models import User
+from core.models import clear_cache_on_commit
+
+
+class ClearCacheAdminMixin:
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet[Any]):
+        # bulk deletes skip Model.delete(), clear the rows' caches here
+        model: type[ClearCacheMixin] = queryset.model
+        keys = model.queryset_cache_keys(queryset)
+        super().delete_queryset(request, queryset)  # type: ignore
+        clear_cache_on_commit(*keys)
 
 
 @admin.register(Settings)
-class SettingsAdmin(admin.ModelAdmin[Settings]):
+class SettingsAdmin(ClearCacheAdminMixin, admin.ModelAdmin[Settings]):
     list_display = ["sick_leave_per_month", "casual_leave_per_month"]
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(ClearCacheAdminMixin, BaseUserAdmin):
     fieldsets = (
         *BaseUserAdmin.fieldsets,
         (
@@ -44,7 +58,7 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(Project)
-class ProjectAdmin(admin.ModelAdmin[Project]):
+class ProjectAdmin(ClearCacheAdminMixin, admin.ModelAdmin[Project]):
     search_fields = ["id", "name"]
     list_display = ["id", "name"]
 
@@ -53,7 +67,7 @@ class ProjectAdmin(admin.ModelAdmin[Project]):
 
 
 @admin.register(Activity)
-class ActivityAdmin(admin.ModelAdmin[Activity]):
+class ActivityAdmin(ClearCacheAdminMixin, admin.ModelAdmin[Activity]):
     search_fields = ["id", "name"]
     list_display = ["id", "name"]
 
@@ -62,7 +76,7 @@ class ActivityAdmin(admin.ModelAdmin[Activity]):
 
 
 @admin.register(TimeLog)
-class TimeLogAdmin(admin.ModelAdmin[TimeLog]):
+class TimeLogAdmin(ClearCacheAdminMixin, admin.ModelAdmin[TimeLog]):
     search_fields = ["user__username", "project__name", "activity__name"]
     list_display = [
         "id",
@@ -98,7 +112,7 @@ class TimeLogAdmin(admin.ModelAdmin[TimeLog]):
 
 
 @admin.register(Holiday)
-class HolidayAdmin(admin.ModelAdmin[Holiday]):
+class HolidayAdmin(ClearCacheAdminMixin, admin.ModelAdmin[Holiday]):
     search_fields = ["id", "name"]
     list_display = ["id", "name", "date"]
 
@@ -107,7 +121,9 @@ class HolidayAdmin(admin.ModelAdmin[Holiday]):
 
 
 @admin.register(AbsenceBalance)
-class AbsenceBalanceAdmin(admin.ModelAdmin[AbsenceBalance]):
+class AbsenceBalanceAdmin(
+    ClearCacheAdminMixin, admin.ModelAdmin[AbsenceBalance]
+):
     search_fields = ["id", "user__username", "description"]
     list_display = ["id", "user", "date", "description", "delta", "created_by"]
 
@@ -1,5 +1,8 @@
 import datetime
+import hashlib
 from datetime import timedelta
+from typing import Any
+from typing import Callable
 from typing import Union
 
 import httpx
@@ -8,12 +11,15 @@ from django.contrib.auth import login
 from django.contrib.auth import logout
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.password_validation import validate_password
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.db import transaction
 from django.db.models import Case
 from django.db.models import DurationField
 from django.db.models import ExpressionWrapper
 from django.db.models import F
+from django.db.models import QuerySet
 from django.db.models import Sum
 from django.db.models import Value
 from django.db.models import When
@@ -23,9 +29,13 @@ from django.http import HttpResponse
 from django.shortcuts import get_list_or_404
 from django.utils import timezone
 from django.utils.timezone import now
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
 from ninja import NinjaAPI
+from ninja.decorators import decorate_view
 from ninja.pagination import paginate  # type: ignore
 from ninja.security import django_auth
 from ninja.security import django_auth_superuser
@@ -36,6 +46,7 @@ from core.models import Holiday
 from core.models import Project
 from core.models import TimeLog
 from core.models import User
+from core.pagination import KeysetPagination
 from core.schemas import AbsenceBalanceDTO
 from core.schemas import ActivityDTO
 from core.schemas import AddHoliday
@@ -64,6 +75,66 @@ from core.schemas import WorkingHoursSummary
 
 api = NinjaAPI(docs_url="/docs/", csrf=True)
 
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# reference tables are small and read on most pages, the whole list is
+# cached and sliced by @paginate
+REFERENCE_CACHE_TIMEOUT = 300
+
+
+def reference_list(
+    request: HttpRequest, key: str, queryset: QuerySet[Any]
+) -> dict[str, Any]:
+    def load():
+        items = list(queryset.values())
+        etag = hashlib.md5(repr(items).encode()).hexdigest()
+        return {"etag": etag, "items": items}
+
+    # the etag check and the view both need the list, fetch it from the
+    # cache only once per request
+    loaded: dict[str, dict[str, Any]] = request.__dict__.setdefault(
+        "_reference_lists", {}
+    )
+    if key not in loaded:
+        loaded[key] = cache.get_or_set(  # type: ignore
+            key, load, REFERENCE_CACHE_TIMEOUT
+        )
+    return loaded[key]
+
+
+def reference_list_view(load: Callable[[HttpRequest], dict[str, Any]]):
+    def etag_func(request: HttpRequest, *args: Any, **kwargs: Any):
+        # ninja authenticates inside the view, never answer 304 before that
+        if not request.user.is_authenticated:
+            return None
+        return load(request)["etag"]
+
+    # clients revalidate on every request and get a 304 while the cached
+    # list is unchanged
+    return decorate_view(
+        condition(etag_func=etag_func),
+        cache_control(private=True, no_cache=True),
+        vary_on_cookie,
+    )
+
+
+def cached_projects(request: HttpRequest) -> dict[str, Any]:
+    return reference_list(
+        request, Project.CACHE_KEY, Project.objects.order_by("-id")
+    )
+
+
+def cached_activities(request: HttpRequest) -> dict[str, Any]:
+    return reference_list(
+        request, Activity.CACHE_KEY, Activity.objects.order_by("-id")
+    )
+
+
+def cached_holidays(request: HttpRequest) -> dict[str, Any]:
+    return reference_list(
+        request, Holiday.CACHE_KEY, Holiday.objects.order_by("date")
+    )
+
 
 @api.exception_handler(ValidationError)
 def django_validation_error(request: HttpRequest, exc: ValidationError):
@@ -91,38 +162,53 @@ def get_csrf_token(request: HttpRequest):
 
 
 @api.get("/projects/", response=list[ProjectDTO], auth=django_auth)
-@paginate
+@reference_list_view(cached_projects)
+@paginate(KeysetPagination)  # type: ignore
 def list_projects(request: HttpRequest):
-    return Project.objects.all().order_by("-id")
+    return cached_projects(request)["items"]
 
 
-@api.post("/projects/", response=GenericDTO, auth=django_auth)
+@api.post(
+    "/projects/",
+    response={200: GenericDTO, 409: GenericDTO},
+    auth=django_auth,
+)
 def create_project(request: HttpRequest, project: CreateProject):
     try:
         Project.objects.create(name=project.project)
-        return 200, {"detail": "Project created successfully."}
-    except Exception:
-        return 400, {"detail": "Something went wrong."}
+    except IntegrityError:
+        return 409, {"detail": "Project already exists."}
+    return 200, {"detail": "Project created successfully."}
 
 
 @api.get("/activities/", response=list[ActivityDTO], auth=django_auth)
-@paginate
+@reference_list_view(cached_activities)
+@paginate(KeysetPagination)  # type: ignore
 def list_activities(request: HttpRequest):
-    return Activity.objects.all().order_by("-id")
+    return cached_activities(request)["items"]
 
 
-@api.post("/activities/", response=GenericDTO, auth=django_auth)
+@api.post(
+    "/activities/",
+    response={200: GenericDTO, 409: GenericDTO},
+    auth=django_auth,
+)
 def create_activity(request: HttpRequest, activity: CreateActivity):
     try:
         Activity.objects.create(name=activity.activity)
-        return 200, {"detail": "Activity created successfully."}
-    except Exception:
-        return 400, {"detail": "Something went wrong."}
+    except IntegrityError:
+        return 409, {"detail": "Activity already exists."}
+    return 200, {"detail": "Activity created successfully."}
 
 
 @api.get("/users/current/", response=UserDTO, auth=django_auth)
 def current_user(request: HttpRequest):
-    return request.user
+    key = User.cache_key(request.user.pk)  # type: ignore
+    data = cache.get(key)
+    if data is None:
+        data = UserDTO.from_orm(request.user).model_dump()
+        cache.set(key, data, 60)
+    return data
 
 
 @api.post(
@@ -146,12 +232,12 @@ def create_user(request: HttpRequest, user: CreateUser):
     response={200: list[UserListDTO], 400: GenericDTO},
     auth=django_auth_superuser,
 )
-@paginate
+@paginate(KeysetPagination)  # type: ignore
 def list_users(request: HttpRequest):
-    user_obj = User.objects.annotate(
+    user_obj = User.objects.defer("password").annotate(
         absence_balance=Coalesce(Sum("absence_balances__delta"), 0.0)
     )
-    return user_obj
+    return user_obj.order_by("-id")
 
 
 @api.post(
@@ -175,13 +261,13 @@ def change_password(request: HttpRequest, data: ChangePassword):
     auth=django_auth,
     response={200: list[TimeLogDTO]},
 )
-@paginate
+@paginate(KeysetPagination)  # type: ignore
 def list_time_logs(request: HttpRequest):
     if request.user.is_superuser:  # type: ignore
         objs = TimeLog.objects.filter(user__is_active=True)
     else:
         objs = TimeLog.objects.filter(user=request.user, user__is_active=True)
-    return objs.order_by("-id")
+    return objs.select_related("user", "project", "activity").order_by("-id")
 
 
 @api.get(
@@ -190,10 +276,22 @@ def list_time_logs(request: HttpRequest):
     response={200: TimeLogDTO, 404: GenericDTO},
 )
 def current_time_log(request: HttpRequest):
-    obj = TimeLog.objects.filter(user=request.user, end=None).first()
-    if not obj:
+    key = TimeLog.active_cache_key(request.user.pk)  # type: ignore
+    data = cache.get(key)
+    if data is None:
+        obj = (
+            TimeLog.objects.filter(user=request.user, end=None)
+            .select_related("user", "project", "activity")
+            .first()
+        )
+        # an empty dict caches "no active session" as well, briefly, since
+        # a read racing start_time_log can store it after the commit
+        data = TimeLogDTO.from_orm(obj).model_dump() if obj else {}
+        cache.set(key, data, 300 if data else 5)
+    if not data:
         return 404, {"detail": "Not found."}
-    return obj
+    # already serialised, the aliased fields wouldn't validate again
+    return api.create_response(request, data, status=200)
 
 
 @api.post(
@@ -203,22 +301,23 @@ def current_time_log(request: HttpRequest):
 )
 def start_time_log(request: HttpRequest, data: StartTimeLog):
     try:
-        if TimeLog.objects.filter(user=request.user, end=None).exists():
-            return 400, {"detail": "An active session already exists."}
-        obj = TimeLog.objects.create(
-            user=request.user,
-            date=data.date if data.date else timezone.localdate(),
-            start=timezone.now(),
-            end=None,
-            project=Project.objects.get(id=data.project),
-            activity=Activity.objects.get(id=data.activity),
-        )
-        obj.save()
+        with transaction.atomic():
+            obj = TimeLog.objects.create(
+                user=request.user,
+                date=data.date if data.date else timezone.localdate(),
+                start=timezone.now(),
+                end=None,
+                project=Project.objects.get(id=data.project),
+                activity=Activity.objects.get(id=data.activity),
+            )
         return obj
     except Project.DoesNotExist:
         return 400, {"detail": "Project does not exist."}
     except Activity.DoesNotExist:
         return 400, {"detail": "Activity does not exist."}
+    except IntegrityError:
+        # raised by the one_active_timelog_per_user constraint
+        return 400, {"detail": "An active session already exists."}
 
 
 @api.post("/time-logs/end/", auth=django_auth, response=GenericDTO)
@@ -226,6 +325,7 @@ def end_time_log(request: HttpRequest):
     TimeLog.objects.filter(user=request.user, end=None).update(
         end=timezone.now()
     )
+    TimeLog.clear_active_cache(request.user.pk)  # type: ignore
     return {"detail": "Success."}
 
 
@@ -234,11 +334,10 @@ def end_time_log(request: HttpRequest):
 )
 def end_users_time_log(request: HttpRequest, data: EndSessionUserIds):
     users = get_list_or_404(User, id__in=data.user_ids)
-    updated_count = 0
-    for user in users:
-        updated_count += TimeLog.objects.filter(
-            user=user, end__isnull=True
-        ).update(end=timezone.now())
+    updated_count = TimeLog.objects.filter(
+        user__in=users, end__isnull=True
+    ).update(end=timezone.now())
+    TimeLog.clear_active_cache(*[user.pk for user in users])
     return {"detail": f"{updated_count} users sessions terminated."}
 
 
@@ -265,34 +364,50 @@ def time_log_summary(
         users = User.objects.filter(id=request.user.pk, is_active=True)
         logs = logs.filter(user=request.user)
         absences = absences.filter(user=request.user)
-    logs = logs.values("user", "date", "start", "end")
-    holidays = Holiday.objects.filter(date__gte=start, date__lte=end)
+    users = users.only(
+        "id", "username", *[f"expected_hours_{w}" for w in WEEKDAYS]
+    )
+    absences = absences.values_list("date", "user", "description")
+    logs = logs.values("user", "date").annotate(
+        duration=Sum(
+            ExpressionWrapper(
+                F("end") - F("start"), output_field=DurationField()
+            )
+        )
+    )
+    holidays = Holiday.objects.filter(
+        date__gte=start, date__lte=end
+    ).values_list("date", "name")
 
     # data generation
-    holidays_map = {h.date: h.name for h in holidays}
+    holidays_map = dict(holidays)
+    hours_map = {
+        (l["user"], l["date"]): l["duration"].total_seconds() / 3600
+        for l in logs
+    }
     absences_map = {
-        f"{a.date}_{a.user.username}": a.description for a in absences
+        (date, user_id): description for date, user_id, description in absences
     }
+    dates = [
+        start + datetime.timedelta(days=i)
+        for i in range((end - start).days + 1)
+    ]
     output: list[TimeLogSummaryDTO] = []
     for u in users:
         user_data = TimeLogSummaryDTO(user=u.username, summary=[])
-        date = start
-        while date <= end:
-            logs_per_day = [
-                l for l in logs if l["date"] == date and l["user"] == u.pk
-            ]
-            hours_worked = (
-                sum(
-                    [
-                        (i["end"] - i["start"]).total_seconds()
-                        for i in logs_per_day
-                    ]
-                )
-                / 3600
-            )
-            weekday = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"][
-                date.weekday()
-            ]
+        expected_hours_per_weekday = (
+            u.expected_hours_mon,
+            u.expected_hours_tue,
+            u.expected_hours_wed,
+            u.expected_hours_thu,
+            u.expected_hours_fri,
+            u.expected_hours_sat,
+            u.expected_hours_sun,
+        )
+        for date in dates:
+            hours_worked = hours_map.get((u.pk, date), 0.0)
+            weekday_index = date.weekday()
+            weekday = WEEKDAYS[weekday_index]
 
             holiday = holidays_map.get(date, "")
             # if there is no existing holiday in saturday, mark holiday as saturday
@@ -300,11 +415,11 @@ def time_log_summary(
             # add a field in settings to choose if saturday and sunday are holidays
             if weekday == "sat" and not holiday:
                 holiday = "Saturday"
-            absence = absences_map.get(f"{date}_{u.username}", "")
+            absence = absences_map.get((date, u.pk), "")
             expected_hours = (
                 0
                 if holiday or absence
-                else getattr(u, f"expected_hours_{weekday}", 0)
+                else expected_hours_per_weekday[weekday_index]
             )
             user_data.summary.append(
                 TimeLogSummaryPerDay(
@@ -316,7 +431,6 @@ def time_log_summary(
                     absence=absence,
                 )
             )
-            date += datetime.timedelta(days=1)
         output.append(user_data)
     return output
 
@@ -339,8 +453,10 @@ def update_time_logs(request: HttpRequest, data: EditTimeLogs):
     if data.end_time is not None:
         update_fields["end"] = data.end_time
 
+    user_ids = set(time_logs.values_list("user_id", flat=True))
     try:
         updated_count = time_logs.update(**update_fields)
+        TimeLog.clear_active_cache(*user_ids)
         return 200, {
             "detail": f"{updated_count} time log item(s) updated successfully."
         }
@@ -355,7 +471,9 @@ def update_time_logs(request: HttpRequest, data: EditTimeLogs):
 )
 def delete_time_logs(request: HttpRequest, data: TimeLogIds):
     time_logs = TimeLog.objects.filter(id__in=data.time_log_ids)
+    user_ids = set(time_logs.values_list("user_id", flat=True))
     count, _ = time_logs.delete()
+    TimeLog.clear_active_cache(*user_ids)
     return 200, {"detail": f"{count} time log item(s) deleted successfully."}
 
 
@@ -364,13 +482,13 @@ def delete_time_logs(request: HttpRequest, data: TimeLogIds):
     auth=django_auth,
     response={200: list[AbsenceBalanceDTO]},
 )
-@paginate
+@paginate(KeysetPagination)  # type: ignore
 def list_absence_balances(request: HttpRequest):
     if request.user.is_superuser:  # type: ignore
         objs = AbsenceBalance.objects.all()
     else:
         objs = AbsenceBalance.objects.filter(user=request.user)
-    return objs.order_by("-id")
+    return objs.select_related("user", "created_by").order_by("-id")
 
 
 @api.get(
@@ -379,10 +497,9 @@ def list_absence_balances(request: HttpRequest):
     response={200: RemainingAbsences},
 )
 def remaining_absences(request: HttpRequest):
-    obj = AbsenceBalance.objects.filter(user=request.user).aggregate(
-        value=Coalesce(Sum("delta"), 0.0)
-    )
-    return obj
+    return {
+        "value": AbsenceBalance.get_balance(request.user.pk)  # type: ignore
+    }
 
 
 @api.post(
@@ -402,49 +519,46 @@ def submit_absence(request: HttpRequest, data: SubmitAbsence):
     holidays = Holiday.objects.filter(
         date__gte=data.start, date__lte=data.end
     ).values_list("date", flat=True)
+    # dates that don't need an absence, fetched in a single query
+    skipped_dates = set(logs.union(existing_absences, holidays))
 
     date = data.start
     dates_to_submit: list[datetime.date] = []
     while date <= data.end:
-        weekday = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"][
-            date.weekday()
-        ]
+        weekday = WEEKDAYS[date.weekday()]
         # TODO: add option to make sunday holiday
         # add a field in settings to choose if saturday and sunday are holidays
-        if (
-            weekday == "sat"
-            or date in holidays
-            or date in existing_absences
-            or date in logs
-        ):
-            date += datetime.timedelta(days=1)
-            continue
-        dates_to_submit.append(date)
-
+        if weekday != "sat" and date not in skipped_dates:
+            dates_to_submit.append(date)
         date += datetime.timedelta(days=1)
 
-    balance = AbsenceBalance.objects.filter(user=request.user).aggregate(
-        value=Coalesce(Sum("delta"), 0.0)
-    )["value"]
-    required = len(dates_to_submit)
-    if balance < required:
-        return 400, {
-            "detail": (
-                "You do not have enough balance, "
-                f"required={float(required)}, balance={balance}."
+    with transaction.atomic():
+        # lock the user row so concurrent submissions can't both spend
+        # the same balance
+        User.objects.select_for_update().filter(pk=request.user.pk).first()
+        balance = AbsenceBalance.objects.filter(user=request.user).aggregate(
+            value=Coalesce(Sum("delta"), 0.0)
+        )["value"]
+        required = len(dates_to_submit)
+        if balance < required:
+            return 400, {
+                "detail": (
+                    "You do not have enough balance, "
+                    f"required={float(required)}, balance={balance}."
+                )
+            }
+        objs = [
+            AbsenceBalance(
+                user=request.user,
+                date=i,
+                description=data.description,
+                delta=-1,
+                created_by=request.user,
             )
-        }
-    objs = [
-        AbsenceBalance(
-            user=request.user,
-            date=i,
-            description=data.description,
-            delta=-1,
-            created_by=request.user,
-        )
-        for i in dates_to_submit
-    ]
-    objs = AbsenceBalance.objects.bulk_create(objs)
+            for i in dates_to_submit
+        ]
+        objs = AbsenceBalance.objects.bulk_create(objs)
+        AbsenceBalance.clear_balance_cache(request.user.pk)  # type: ignore
     return 200, {"detail": f"Successfully submitted {len(objs)} absences."}
 
 
@@ -469,9 +583,10 @@ def auth_logout(request: HttpRequest):
 
 
 @api.get("/holidays/", response=list[HolidayDTO], auth=django_auth)
+@reference_list_view(cached_holidays)
 @paginate
 def list_holidays(request: HttpRequest):
-    return Holiday.objects.all().order_by("date")
+    return cached_holidays(request)["items"]
 
 
 @api.post(
@@ -527,6 +642,7 @@ def import_holidays(request: HttpRequest, data: ImportHolidays):
             ]
 
             created_holidays = Holiday.objects.bulk_create(holiday_objects)
+            Holiday.clear_cache()
         return 200, created_holidays
     except httpx.HTTPError as e:
         return 400, {"detail": f"HTTP error occured: {str(e)}."}
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-15 08:17
+
+import datetime
+
+from django.db import migrations
+from django.db import models
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def close_extra_active_timelogs(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    # keep the newest open log of each user and end the older ones when
+    # the newest one started, otherwise the constraint can't be added
+    TimeLog = apps.get_model("core", "TimeLog")
+    newest: dict[int, datetime.datetime] = {}
+    for obj in (
+        TimeLog.objects.filter(end__isnull=True)
+        .order_by("user_id", "-start", "-id")
+        .iterator()
+    ):
+        if obj.user_id not in newest:
+            newest[obj.user_id] = obj.start
+            continue
+        obj.end = newest[obj.user_id]
+        obj.save(update_fields=["end"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_timelog_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            close_extra_active_timelogs, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="timelog",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("end__isnull", True)),
+                fields=("user",),
+                name="one_active_timelog_per_user",
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.15 on 2026-10-15 08:22
+
+from django.db import migrations
+from django.db.backends.base.schema import BaseDatabaseSchemaEditor
+from django.db.migrations.state import StateApps
+
+
+def merge_duplicate_names(
+    apps: StateApps, schema_editor: BaseDatabaseSchemaEditor
+) -> None:
+    # point time logs at the oldest row of each name and drop the rest,
+    # otherwise the unique constraint can't be added
+    TimeLog = apps.get_model("core", "TimeLog")
+    for model_name, field in [
+        ("Project", "project"),
+        ("Activity", "activity"),
+    ]:
+        Model = apps.get_model("core", model_name)
+        kept: dict[str, int] = {}
+        for obj in Model.objects.order_by("id").iterator():
+            if obj.name not in kept:
+                kept[obj.name] = obj.id
+                continue
+            TimeLog.objects.filter(**{field: obj.id}).update(
+                **{f"{field}_id": kept[obj.name]}
+            )
+            obj.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_timelog_one_active_timelog_per_user"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-15 08:22
+
+from django.db import migrations
+from django.db import models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_merge_duplicate_project_activity_names"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="activity",
+            name="name",
+            field=models.CharField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="name",
+            field=models.CharField(unique=True),
+        ),
+    ]
@@ -1,7 +1,15 @@
 from typing import Any
+from typing import cast
 
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.db import models
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
 
 
 class BaseModel(models.Model):
@@ -15,7 +23,49 @@ class BaseModel(models.Model):
         abstract = True
 
 
-class User(AbstractUser):
+def clear_cache_on_commit(*keys: str):
+    # clearing before commit lets a concurrent read cache the old rows
+    transaction.on_commit(lambda: cache.delete_many(list(keys)))
+
+
+class ClearCacheMixin:
+    """Clears the cache keys of a row after it's saved or deleted."""
+
+    def cache_keys(self) -> list[str]:
+        raise NotImplementedError
+
+    @classmethod
+    def queryset_cache_keys(cls, queryset: QuerySet[Any]) -> list[str]:
+        return list({key for obj in queryset for key in obj.cache_keys()})
+
+    def save(self, *args: Any, **kwargs: Any):
+        super().save(*args, **kwargs)  # type: ignore
+        clear_cache_on_commit(*self.cache_keys())
+
+    def delete(self, *args: Any, **kwargs: Any) -> tuple[int, dict[str, int]]:
+        keys = self.cache_keys()
+        result = super().delete(*args, **kwargs)  # type: ignore
+        clear_cache_on_commit(*keys)
+        return cast(tuple[int, dict[str, int]], result)
+
+
+class CachedListModel(ClearCacheMixin, BaseModel):
+    """Small reference table that the api caches as a whole list."""
+
+    CACHE_KEY: str
+
+    class Meta(BaseModel.Meta):
+        abstract = True
+
+    def cache_keys(self) -> list[str]:
+        return [self.CACHE_KEY]
+
+    @classmethod
+    def clear_cache(cls):
+        clear_cache_on_commit(cls.CACHE_KEY)
+
+
+class User(ClearCacheMixin, AbstractUser):
     expected_hours_sun = models.IntegerField(
         default=0, null=False, blank=False
     )
@@ -38,19 +88,47 @@ class User(AbstractUser):
         default=0, null=False, blank=False
     )
 
+    def cache_keys(self) -> list[str]:
+        return [self.cache_key(self.pk)]
+
+    @staticmethod
+    def cache_key(user_id: int) -> str:
+        return f"core:user:{user_id}"
+
     def __str__(self) -> str:
         return self.username
 
 
-class Project(BaseModel):
-    name = models.CharField()
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def clear_user_cache_on_m2m_change(
+    instance: Any, action: str, reverse: bool, pk_set: Any, **kwargs: Any
+):
+    # the cached UserDTO contains groups and user_permissions
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        user_ids = [instance.pk]
+    elif action == "pre_clear":
+        user_ids = list(instance.user_set.values_list("id", flat=True))
+    else:
+        user_ids = list(pk_set)
+    clear_cache_on_commit(*[User.cache_key(i) for i in user_ids])
+
+
+class Project(CachedListModel):
+    CACHE_KEY = "core:projects"
+
+    name = models.CharField(unique=True)
 
     def __str__(self) -> str:
         return self.name
 
 
-class Activity(BaseModel):
-    name = models.CharField()
+class Activity(CachedListModel):
+    CACHE_KEY = "core:activities"
+
+    name = models.CharField(unique=True)
 
     class Meta:  # type: ignore
         verbose_name_plural = "Activities"
@@ -59,7 +137,7 @@ class Activity(BaseModel):
         return self.name
 
 
-class TimeLog(BaseModel):
+class TimeLog(ClearCacheMixin, BaseModel):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="time_logs"
     )
@@ -78,11 +156,33 @@ class TimeLog(BaseModel):
         Activity, on_delete=models.PROTECT, related_name="time_logs"
     )
 
+    class Meta:  # type: ignore
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user"],
+                condition=models.Q(end__isnull=True),
+                name="one_active_timelog_per_user",
+            )
+        ]
+
+    def cache_keys(self) -> list[str]:
+        return [self.active_cache_key(self.user_id)]  # type: ignore
+
+    @staticmethod
+    def active_cache_key(user_id: int) -> str:
+        return f"core:active-time-log:{user_id}"
+
+    @classmethod
+    def clear_active_cache(cls, *user_ids: int):
+        clear_cache_on_commit(*[cls.active_cache_key(i) for i in user_ids])
+
     def __str__(self) -> str:
         return f"{self.user.username}:{self.project.name}:{self.activity.name}:{self.pk}"
 
 
-class Holiday(BaseModel):
+class Holiday(CachedListModel):
+    CACHE_KEY = "core:holidays"
+
     name = models.CharField()
     date = models.DateField()
 
@@ -90,7 +190,7 @@ class Holiday(BaseModel):
         return self.name
 
 
-class AbsenceBalance(BaseModel):
+class AbsenceBalance(ClearCacheMixin, BaseModel):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="absence_balances"
     )
@@ -103,11 +203,35 @@ class AbsenceBalance(BaseModel):
         related_name="created_absence_balances",
     )
 
+    def cache_keys(self) -> list[str]:
+        return [self.balance_cache_key(self.user_id)]  # type: ignore
+
+    @staticmethod
+    def balance_cache_key(user_id: int) -> str:
+        return f"core:absence-balance:{user_id}"
+
+    @classmethod
+    def get_balance(cls, user_id: int) -> float:
+        key = cls.balance_cache_key(user_id)
+        balance = cache.get(key)
+        if balance is None:
+            balance = cls.objects.filter(user_id=user_id).aggregate(
+                value=Coalesce(Sum("delta"), 0.0)
+            )["value"]
+            cache.set(key, balance, 300)
+        return balance
+
+    @classmethod
+    def clear_balance_cache(cls, *user_ids: int):
+        clear_cache_on_commit(*[cls.balance_cache_key(i) for i in user_ids])
+
     def __str__(self) -> str:
         return f"{self.user.username}:{self.pk}"
 
 
-class Settings(BaseModel):
+class Settings(ClearCacheMixin, BaseModel):
+    CACHE_KEY = "core:settings:1"
+
     sick_leave_per_month = models.FloatField(default=1)
     casual_leave_per_month = models.FloatField(default=1.5)
 
@@ -118,5 +242,16 @@ class Settings(BaseModel):
         self.id = 1
         super().save(*args, **kwargs)
 
+    def cache_keys(self) -> list[str]:
+        return [self.CACHE_KEY]
+
+    @classmethod
+    def load(cls) -> "Settings":
+        obj = cache.get(cls.CACHE_KEY)
+        if obj is None:
+            obj = cls.objects.get(id=1)
+            cache.set(cls.CACHE_KEY, obj, 3600)
+        return obj
+
     def __str__(self):
         return "Settings"
@@ -0,0 +1,69 @@
+from typing import Any
+from typing import Optional
+
+from django.db.models import Model
+from django.db.models import QuerySet
+from ninja import Field
+from ninja import Schema
+from ninja.conf import settings
+from ninja.errors import HttpError
+from ninja.pagination import LimitOffsetPagination
+
+
+def _item_id(item: Any) -> int:
+    if isinstance(item, Model):
+        return item.pk
+    return item["id"]
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination with an optional id cursor.
+
+    Without a cursor this behaves exactly like LimitOffsetPagination. When
+    a cursor is passed, items with an id lower than the cursor are returned
+    and the count is skipped, so the items must be ordered by "-id". A
+    cursor can't be combined with an offset.
+    Querysets are filtered in SQL (an index range scan on the primary key),
+    cached lists are filtered in python, which is a linear scan.
+    """
+
+    class Input(LimitOffsetPagination.Input):  # type: ignore
+        cursor: Optional[int] = Field(None, ge=1)
+
+    class Output(Schema):  # type: ignore
+        items: list[Any]
+        count: Optional[int] = None
+        next_cursor: Optional[int] = None
+
+    def paginate_queryset(  # type: ignore
+        self,
+        queryset: QuerySet[Any] | list[Any],
+        pagination: Input,
+        **params: Any,
+    ) -> Any:
+        limit = min(pagination.limit, settings.PAGINATION_MAX_LIMIT)
+        output: dict[str, Any]
+        if pagination.cursor is None:
+            output = super().paginate_queryset(  # type: ignore
+                queryset, pagination, **params  # type: ignore
+            )
+            items = output["items"] = list(output["items"])
+            has_next = pagination.offset + len(items) < output["count"]
+        else:
+            if pagination.offset:
+                raise HttpError(400, "Pass either an offset or a cursor.")
+            if isinstance(queryset, QuerySet):
+                queryset = queryset.filter(id__lt=pagination.cursor)
+            else:
+                queryset = [
+                    i for i in queryset if _item_id(i) < pagination.cursor
+                ]
+            # one extra row tells whether there is a next page
+            items = list(queryset[: limit + 1])
+            has_next = len(items) > limit
+            items = items[:limit]
+            output = {"items": items}
+        if items and has_next:
+            output["next_cursor"] = _item_id(items[-1])
+        return output
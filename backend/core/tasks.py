@@ -11,30 +11,42 @@ from core.models import User
 
 @transaction.atomic
 def absence_balance_credit():
-    users = User.objects.all()
-    superuser = User.objects.filter(is_superuser=True).first()
-    if superuser is None:
+    users = User.objects.only("id")
+    superuser_id = (
+        User.objects.filter(is_superuser=True)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if superuser_id is None:
         raise ObjectDoesNotExist("No admin found.")
     now = timezone.now()
-    settings = Settings.objects.get(id=1)
-    if not settings:
+    try:
+        settings = Settings.load()
+    except Settings.DoesNotExist:
         raise ObjectDoesNotExist("Settings doesn't exist.")
 
+    objs: list[AbsenceBalance] = []
     for user in users:
-        AbsenceBalance.objects.create(
-            user=user,
-            date=now,
-            description="Sick leave credit",
-            delta=settings.sick_leave_per_month,
-            created_by=superuser,
+        objs.append(
+            AbsenceBalance(
+                user=user,
+                date=now,
+                description="Sick leave credit",
+                delta=settings.sick_leave_per_month,
+                created_by_id=superuser_id,
+            )
         )
-        AbsenceBalance.objects.create(
-            user=user,
-            date=now,
-            description="Casual leave credit",
-            delta=settings.casual_leave_per_month,
-            created_by=superuser,
+        objs.append(
+            AbsenceBalance(
+                user=user,
+                date=now,
+                description="Casual leave credit",
+                delta=settings.casual_leave_per_month,
+                created_by_id=superuser_id,
+            )
         )
+    AbsenceBalance.objects.bulk_create(objs, batch_size=1000)
+    AbsenceBalance.clear_balance_cache(*[user.pk for user in users])
 
 
 @cron("0 0 1 * *")
@@ -15,6 +15,7 @@ class Environment(BaseSettings):
     SECRET_KEY: str = "STRONG_KEY"
     TIME_ZONE: str = "Asia/Kathmandu"
     DRAMATIQ_URL: str = "redis://localhost:6379"
+    CACHE_URL: str = "redis://localhost:6379/1"
 
 
 ENV = Environment()
@@ -96,10 +96,28 @@ DATABASES = {
         "PASSWORD": ENV.POSTGRES_PASSWORD,
         "HOST": ENV.POSTGRES_HOST,
         "PORT": ENV.POSTGRES_PORT,
+        "CONN_MAX_AGE": 60,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": ENV.CACHE_URL,
+    }
+}
+
+# Sessions are read from the cache and written through to the database,
+# so a cache flush doesn't log everyone out.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "default"
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 